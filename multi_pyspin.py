@@ -9,14 +9,30 @@
 #   -spinnaker python version:      spinnaker_python-1.23.0.27-cp36-cp36m-linux_x86_64
 
 import os
+import time
 import atexit
-import statistics
-from datetime import datetime
+import queue
+import hashlib
+import operator
+import logging
+import threading
+import functools
+import concurrent.futures
 from contextlib import suppress
+from contextlib import contextmanager
 
 import yaml
 
-import PySpin
+import numpy as np
+
+# NOTE: PySpin is imported lazily (see _ensure_started()) since importing it and enumerating cameras is slow
+PySpin = None
+
+# Use LibYAML bindings if PyYAML was built with them, otherwise fall back to the pure-python loader
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
 
 # ------------------- #
@@ -28,49 +44,123 @@ import PySpin
 _SYSTEM = None
 _SYSTEM_EVENT_HANDLER = None
 
-# Maintain dictionary which keeps correspondences between camera serial and camera stuff (camera object, timestamp
-# offset, etc...)
+# Camera arrival/removal events get queued by the system event handler and are handled on a worker thread
+_CAM_EVENT_QUEUE = queue.Queue()
+_CAM_EVENT_WORKER = None
+
+# Module is started (PySpin imported, cameras enumerated, etc...) on first use
+_STARTED = False
+_START_LOCK = threading.Lock()
+
+# Maintain dictionary which keeps correspondences between camera serial and camera stuff (see _CamEntry)
 _SERIAL_DICT = {}
+_SERIAL_DICT_LOCK = threading.Lock()  # Guards adding/removing cameras, which can happen from multiple threads
 
 # Set number of iterations used to compute timestamp offset
 _TIMESTAMP_OFFSET_ITERATIONS = 20
 
+# Logger for all camera output; silent unless set_verbose(True) is called or logging is configured by the caller
+_LOG = logging.getLogger(__name__)
+
+# Resolved PySpin attributes keyed by name (access modes are resolved on start up, others are added when first used)
+_PYSPIN_CONSTS = {}
+
+# Resolved string arguments (e.g. "PySpin.AcquisitionMode_Continuous") of node commands keyed by string
+_PYSPIN_ARGS = {}
+
+# Compiled "init" commands keyed by yaml file path and content hash
+_INIT_PROGRAMS = {}
+
+# Parsed yaml files keyed by yaml file path and content hash
+_YAML_DICTS = {}
+
+# Auto node which lets camera change the value of a cached setting by itself; frame rate is clamped by the camera based
+# on exposure, so it can also change while auto exposure is on
+_SETTING_AUTO_NODES = {'Gain': 'GainAuto',
+                       'ExposureTime': 'ExposureAuto',
+                       'AcquisitionFrameRate': 'ExposureAuto'}
+
+# Thread pool used to grab images from multiple cameras in parallel; threads are only started when first used
+_GRAB_POOL = concurrent.futures.ThreadPoolExecutor()
+
+
+# ------------------- #
+# Camera entry        #
+# ------------------- #
+
+
+class _CamEntry(object):
+    """ Holds camera stuff (camera object, timestamp offset, etc...) for a single camera serial """
+
+    __slots__ = ('cam', 'timestamp_offset_ns', 'streaming', 'trusted', 'nodes', 'checked_nodes', 'settings')
+
+    def __init__(self, cam, timestamp_offset_ns):
+        self.cam = cam                                  # camera object
+        self.timestamp_offset_ns = timestamp_offset_ns  # timestamp offset in nanoseconds
+        self.streaming = None                           # (cam, timestamp_offset_ns) while acquiring, otherwise None
+        self.trusted = False                            # whether camera has already been validated
+        self.nodes = {}                                 # resolved cam nodes keyed by cam node string
+        self.checked_nodes = set()                      # (cam node string, mode string) which passed access check
+        self.settings = {}                              # cached gain/exposure/frame rate keyed by cam node string
+
 
 # ------------------- #
 # "static" functions  #
 # ------------------- #
 
 
-def _node_cmd(cam, cam_node_str, cam_method_str, pyspin_mode_str=None, cam_node_arg=None):
-    """ Performs method on input cam node with optional access mode check """
+def _pyspin_const(pyspin_str):
+    """ Returns PySpin attribute given its name; resolved attributes are memoized """
+
+    try:
+        return _PYSPIN_CONSTS[pyspin_str]
+    except KeyError:
+        return _PYSPIN_CONSTS.setdefault(pyspin_str, getattr(PySpin, pyspin_str))
+
+
+def _resolve_pyspin_arg(cam_node_arg):
+    """ Returns PySpin attribute if input string argument is of the form "PySpin.<attribute>", otherwise returns the
+        input string; resolved arguments are memoized """
 
-    # Print command info
-    info_str = cam.GetUniqueID() + ' - executing: "' + '.'.join([cam_node_str, cam_method_str]) + '('
-    if cam_node_arg is not None:
-        info_str += str(cam_node_arg)
-    print(info_str + ')"')
+    try:
+        return _PYSPIN_ARGS[cam_node_arg]
+    except KeyError:
+        pass
+
+    resolved_cam_node_arg = cam_node_arg
+    cam_node_arg_split = cam_node_arg.split('.')
+    if cam_node_arg_split[0] == 'PySpin':
+        if len(cam_node_arg_split) == 2:
+            resolved_cam_node_arg = _pyspin_const(cam_node_arg_split[1])
+        else:
+            raise RuntimeError('Arguments containing nested PySpin attributes are currently not supported...')
+
+    return _PYSPIN_ARGS.setdefault(cam_node_arg, resolved_cam_node_arg)
+
+
+@functools.lru_cache(maxsize=256)
+def _node_getter(cam_node_str):
+    """ Returns callable which resolves (possibly nested) cam node string on input cam """
+
+    return operator.attrgetter(cam_node_str)
 
-    # Get camera node
-    cam_node = cam
-    cam_node_str_split = cam_node_str.split('.')
-    for sub_cam_node_str in cam_node_str_split:
-        cam_node = getattr(cam_node, sub_cam_node_str)
+
+def _execute_node_cmd(cam, cam_node_str, cam_node, cam_method_str, pyspin_mode_str, cam_node_arg):
+    """ Performs method on resolved cam node with optional access mode check """
+
+    # Log command info; string is only built if it will actually be logged
+    if _LOG.isEnabledFor(logging.DEBUG):
+        info_str = cam.GetUniqueID() + ' - executing: "' + cam_node_str + '.' + cam_method_str + '('
+        if cam_node_arg is not None:
+            info_str += str(cam_node_arg)
+        _LOG.debug(info_str + ')"')
 
     # Perform optional access mode check
     if pyspin_mode_str is not None:
-        if cam_node.GetAccessMode() != getattr(PySpin, pyspin_mode_str):
+        if cam_node.GetAccessMode() != _pyspin_const(pyspin_mode_str):
             raise RuntimeError('Access mode check failed for: "' + cam_node_str + '" with mode: "' +
                                pyspin_mode_str + '".')
 
-    # Format command argument in case it's a string containing a PySpin attribute
-    if isinstance(cam_node_arg, str):
-        cam_node_arg_split = cam_node_arg.split('.')
-        if cam_node_arg_split[0] == 'PySpin':
-            if len(cam_node_arg_split) == 2:
-                cam_node_arg = getattr(PySpin, cam_node_arg_split[1])
-            else:
-                raise RuntimeError('Arguments containing nested PySpin attributes are currently not supported...')
-
     # Perform command
     if cam_node_arg is None:
         return getattr(cam_node, cam_method_str)()
@@ -78,27 +168,52 @@ def _node_cmd(cam, cam_node_str, cam_method_str, pyspin_mode_str=None, cam_node_
         return getattr(cam_node, cam_method_str)(cam_node_arg)
 
 
-def _setup(cam, yaml_path):
-    """ This will setup (initialize + configure) input camera given a path to a yaml file """
+def _load_yaml_cached(yaml_path):
+    """ Loads yaml file; parsed result is cached in memory and reused until the contents of the yaml file change.
+        Returns parsed yaml along with the cache key it corresponds to """
 
     if not os.path.isfile(yaml_path):
         raise RuntimeError('"' + yaml_path + '" could not be found!')
 
-    # Print setup
-    print(cam.GetUniqueID() + ' - setting up...')
+    # Cache is keyed by path and content hash of yaml file, so any edit is caught regardless of modification time; yaml
+    # files are small, so reading and hashing them is cheap
+    with open(yaml_path, 'rb') as file:
+        yaml_bytes = file.read()
+    cache_key = (os.path.abspath(yaml_path), hashlib.sha1(yaml_bytes).hexdigest())
+    if cache_key in _YAML_DICTS:
+        return _YAML_DICTS[cache_key], cache_key
 
-    # Init camera
-    cam.Init()
+    # Parse yaml file; parse the bytes which were hashed so the cache key always matches the parsed contents
+    yaml_dict = yaml.load(yaml_bytes, Loader=_YamlLoader)
+
+    return _YAML_DICTS.setdefault(cache_key, yaml_dict), cache_key
+
+
+def _compile_init_program(yaml_dict):
+    """ Compiles "init" commands of parsed yaml configuration into a list of node commands """
+
+    # Each node command is a tuple of (cam node string, cam node getter, cam method string, PySpin mode string, cam node
+    # argument), with the cam node getter and any PySpin attribute arguments already resolved, so the commands can just
+    # be executed when setting up a camera.
+
+    init_program = []
 
-    # Load yaml file and grab init commands
+    # Set stream buffer handling mode first, but only if top level "buffer_mode" field is provided (e.g. "NewestOnly"
+    # so get_image() returns the latest frame instead of stale buffered ones); otherwise camera's mode is left as is
+    if isinstance(yaml_dict, dict) and 'buffer_mode' in yaml_dict:
+        buffer_mode = str(yaml_dict['buffer_mode'])
+        init_program.append(('TLStream.StreamBufferHandlingMode',
+                             _node_getter('TLStream.StreamBufferHandlingMode'),
+                             'SetValue',
+                             'RW',
+                             _resolve_pyspin_arg('PySpin.StreamBufferHandlingMode_' + buffer_mode)))
+
+    # Grab init commands
     node_cmd_dicts = None
-    with open(yaml_path, 'rb') as file:
-        yaml_dict = yaml.load(file, Loader=yaml.SafeLoader)
-        # Get commands from "init"
-        if isinstance(yaml_dict, dict) and 'init' in yaml_dict:
-            node_cmd_dicts = yaml_dict['init']
+    if isinstance(yaml_dict, dict) and 'init' in yaml_dict:
+        node_cmd_dicts = yaml_dict['init']
 
-    # Perform node commands if they are provided
+    # Compile node commands if they are provided
     if isinstance(node_cmd_dicts, list):
         # Iterate over commands
         for node_cmd_dict in node_cmd_dicts:
@@ -130,42 +245,83 @@ def _setup(cam, yaml_path):
                     # Get mode - Assume this is RW
                     pyspin_mode_str = 'RW'
 
-                    # Perform command
-                    _node_cmd(cam,
-                              cam_node_str,
-                              cam_method_str,
-                              pyspin_mode_str,
-                              cam_node_arg)
+                    # Resolve argument in case it's a string containing a PySpin attribute
+                    if isinstance(cam_node_arg, str):
+                        cam_node_arg = _resolve_pyspin_arg(cam_node_arg)
+
+                    # Append command
+                    init_program.append((cam_node_str,
+                                         _node_getter(cam_node_str),
+                                         cam_method_str,
+                                         pyspin_mode_str,
+                                         cam_node_arg))
                 else:
                     raise RuntimeError('Only one camera node per yaml "tick" is supported. '
                                        'Please fix: ' + str(cam_node_str))
 
+    return init_program
 
-def _compute_timestamp_offset(cam, timestamp_offset_iterations):
-    """ Gets timestamp offset in seconds from input camera """
+
+def _get_init_program(cache_key, yaml_dict):
+    """ Returns compiled "init" commands of parsed yaml file; compiled commands are cached by the key returned from
+        _load_yaml_cached() along with yaml_dict, so they always correspond to the parsed contents """
+
+    if cache_key not in _INIT_PROGRAMS:
+        _INIT_PROGRAMS[cache_key] = _compile_init_program(yaml_dict)
+
+    return _INIT_PROGRAMS[cache_key]
+
+
+def _setup(cam, init_program):
+    """ This will setup (initialize + configure) input camera given compiled "init" commands """
+
+    # Log setup
+    _LOG.info('%s - setting up...', cam.GetUniqueID())
+
+    # Init camera
+    cam.Init()
+
+    # Perform node commands
+    for cam_node_str, node_getter, cam_method_str, pyspin_mode_str, cam_node_arg in init_program:
+        _execute_node_cmd(cam, cam_node_str, node_getter(cam), cam_method_str, pyspin_mode_str, cam_node_arg)
+
+
+def _compute_timestamp_offsets(cams, timestamp_offset_iterations):
+    """ Gets timestamp offsets in nanoseconds from input cameras """
 
     # This method is required because the timestamp stored in the camera is relative to when it was powered on, so an
     # offset needs to be applied to get it into epoch time; from tests I've done, this appears to be accurate to ~1e-3
     # seconds.
 
-    timestamp_offsets = []
+    # Cameras are sampled together in each iteration. Host time is sampled right after each camera's latch, since
+    # latches are sequential round trips and sharing one host time sample would give each camera a fixed offset error.
+
+    timestamp_offsets_ns = np.empty((timestamp_offset_iterations, len(cams)), dtype=np.int64)
+    host_timestamps_ns = np.empty(len(cams), dtype=np.int64)
     for i in range(timestamp_offset_iterations):
-        # Latch timestamp. This basically "freezes" the current camera timer into a variable that can be read with
-        # TimestampLatchValue()
-        cam.TimestampLatch.Execute()
+        # Latch timestamps. This basically "freezes" the current camera timer into a variable that can be read with
+        # TimestampLatchValue(). Get host time in nanoseconds right after each latch.
+        for j, cam in enumerate(cams):
+            cam.TimestampLatch.Execute()
+            host_timestamps_ns[j] = int(time.time()*1e9)
 
-        # Compute timestamp offset in seconds; note that timestamp latch value is in nanoseconds
-        timestamp_offset = datetime.now().timestamp() - cam.TimestampLatchValue.GetValue()/1e9
+        # Compute timestamp offsets in nanoseconds; note that timestamp latch value is in nanoseconds
+        for j, cam in enumerate(cams):
+            timestamp_offsets_ns[i, j] = host_timestamps_ns[j] - cam.TimestampLatchValue.GetValue()
 
-        # Append
-        timestamp_offsets.append(timestamp_offset)
+    # Return the median values
+    return [int(round(timestamp_offset_ns)) for timestamp_offset_ns in np.median(timestamp_offsets_ns, axis=0)]
 
-    # Return the median value
-    return statistics.median(timestamp_offsets)
+
+def _compute_timestamp_offset(cam, timestamp_offset_iterations):
+    """ Gets timestamp offset in nanoseconds from input camera """
+
+    return _compute_timestamp_offsets([cam], timestamp_offset_iterations)[0]
 
 
-def _get_image(cam, timestamp_offset, *args):
-    """ Gets image (and other info) from input camera; caller should handle releasing the image """
+def _get_image(cam, timestamp_offset_ns, *args):
+    """ Gets image (and other info) from input camera; caller should handle releasing the image. Incomplete images are
+        released here and an empty dict is returned """
 
     # Get image
     image = cam.GetNextImage(*args)  # args is most likely a timeout in case trigger is set
@@ -176,14 +332,75 @@ def _get_image(cam, timestamp_offset, *args):
     # Ensure image is complete
     if not image.IsIncomplete():
         # Get data/metadata
-        image_dict['image'] = image                                             # image
-        image_dict['timestamp'] = timestamp_offset + image.GetTimeStamp()/1e9   # timestamp in seconds
-        image_dict['bitsperpixel'] = image.GetBitsPerPixel()                    # bits per pixel
-        image_dict['frameid'] = image.GetFrameID()                              # frame id
+        image_dict['image'] = image                                                 # image
+        image_dict['timestamp_ns'] = timestamp_offset_ns + image.GetTimeStamp()     # timestamp in nanoseconds
+        image_dict['timestamp'] = timestamp_ns_to_seconds(image_dict['timestamp_ns'])  # timestamp in seconds
+        image_dict['bitsperpixel'] = image.GetBitsPerPixel()                        # bits per pixel
+        image_dict['frameid'] = image.GetFrameID()                                  # frame id
+    else:
+        # Caller never gets the image, so release it here or its buffer is never returned to the stream
+        image.Release()
+
+    return image_dict
+
+
+def _image_array(image, bitsperpixel):
+    """ Returns numpy array which is a view (no copy) of input image's buffer; array is only valid until the image is
+        released """
+
+    if bitsperpixel == 8:
+        dtype = np.uint8
+    elif bitsperpixel == 16:
+        dtype = np.uint16
+    else:
+        raise RuntimeError('Image arrays are only supported for 8 and 16 bit pixel formats; got ' +
+                           str(bitsperpixel) + ' bits per pixel.')
+
+    # Buffer is always contiguous, so set shape in place rather than going through reshape()
+    array = np.frombuffer(image.GetData(), dtype=dtype)
+    array.shape = (image.GetHeight(), image.GetWidth())
+
+    return array
+
+
+def _get_image_array(cam, timestamp_offset_ns, *args, copy=False, out=None):
+    """ Gets image (and other info) from input camera along with a numpy array view of the image; caller should handle
+        releasing the image, after which the array is no longer valid unless copy or out is set """
+
+    # Get image dict
+    image_dict = _get_image(cam, timestamp_offset_ns, *args)
+
+    # Wrap image buffer in numpy array; this skips the copy made by GetNDArray(). Packed pixel formats can't be wrapped
+    # directly, so fall back to a copy for those.
+    if image_dict:
+        if image_dict['bitsperpixel'] in (8, 16):
+            image_dict['array'] = _image_array(image_dict['image'], image_dict['bitsperpixel'])
+            if out is not None:
+                np.copyto(out, image_dict['array'])
+                image_dict['array'] = out
+            elif copy:
+                image_dict['array'] = image_dict['array'].copy()
+        else:
+            image_dict['array'] = image_dict['image'].GetNDArray()
+            if out is not None:
+                np.copyto(out, image_dict['array'])
+                image_dict['array'] = out
 
     return image_dict
 
 
+def _cleanup_cam(cam):
+    """ Ends acquisition and de-initializes camera, ignoring any errors """
+
+    # End acquisition
+    with suppress(Exception):
+        cam.EndAcquisition()
+
+    # Deinit
+    with suppress(Exception):
+        cam.DeInit()
+
+
 def _validate_cam(cam, serial):
     """ Checks to see if camera is valid """
 
@@ -217,33 +434,100 @@ def _validate_cam_streaming(cam, serial):
 def _validate_serial(serial):
     """ Checks to see if serial is valid """
 
+    # Every camera access goes through here, so this is where the module gets started on first use
+    if not _STARTED:
+        _ensure_started()
+
     if serial not in _SERIAL_DICT:
         raise RuntimeError('Camera "' + serial + '" not valid, please connect or reconnect!')
 
 
-def _handle_cam_arrival(serial):
-    """ Handles adding a camera """
+def _handle_cam_arrival(serial, cam_list):
+    """ Handles adding a camera; cam_list is a camera list which was enumerated after the camera arrived """
 
-    print(serial + ' - connected')
+    _LOG.info('%s - connected', serial)
 
     # Get camera object
-    cam = _SYSTEM.GetCameras().GetBySerial(serial)
+    cam = cam_list.GetBySerial(serial)
 
     # Get timestamp offset; must initialize first before timestamp can be computed
     cam.Init()
-    timestamp_offset = _compute_timestamp_offset(cam, _TIMESTAMP_OFFSET_ITERATIONS)
+    timestamp_offset_ns = _compute_timestamp_offset(cam, _TIMESTAMP_OFFSET_ITERATIONS)
 
     # Add cam stuff to dict
-    _SERIAL_DICT[serial] = {'cam': cam, 'timestamp_offset': timestamp_offset}
+    with _SERIAL_DICT_LOCK:
+        _SERIAL_DICT[serial] = _CamEntry(cam, timestamp_offset_ns)
 
 
 def _handle_cam_removal(serial):
     """ Handles removing a camera """
 
-    print(serial + ' - removed')
+    _LOG.info('%s - removed', serial)
 
     # Remove cam stuff from dict
-    _SERIAL_DICT.pop(serial, None)
+    with _SERIAL_DICT_LOCK:
+        _SERIAL_DICT.pop(serial, None)
+
+
+def _get_cam_node(serial, cam, cam_node_str):
+    """ Returns cam node; resolved cam nodes are cached per camera until it's de-initialized """
+
+    cam_nodes = _SERIAL_DICT[serial].nodes
+    try:
+        return cam_nodes[cam_node_str]
+    except KeyError:
+        return cam_nodes.setdefault(cam_node_str, _node_getter(cam_node_str)(cam))
+
+
+def _cam_node_cmd(serial, cam, cam_node_str, cam_method_str, pyspin_mode_str, cam_node_arg):
+    """ Performs method on cam node of camera; access mode of each cam node is only checked the first time since the
+        check queries the camera """
+
+    # Any command other than GetValue() might change settings (e.g. UserSetLoad), so clear cached settings
+    if cam_method_str != 'GetValue':
+        _SERIAL_DICT[serial].settings.clear()
+
+    check_key = (cam_node_str, pyspin_mode_str)
+    checked_nodes = _SERIAL_DICT[serial].checked_nodes
+    if pyspin_mode_str is not None and check_key in checked_nodes:
+        pyspin_mode_str = None
+
+    result = _execute_node_cmd(cam,
+                               cam_node_str,
+                               _get_cam_node(serial, cam, cam_node_str),
+                               cam_method_str,
+                               pyspin_mode_str,
+                               cam_node_arg)
+
+    # Only mark as checked once command succeeds
+    if pyspin_mode_str is not None:
+        checked_nodes.add(check_key)
+
+    return result
+
+
+def _get_setting(serial, cam_node_str):
+    """ Returns value of cam node; values are cached until a node of the camera is set or the camera is
+        (re)initialized. Values are not cached while the corresponding auto mode is on, since the camera changes them
+        by itself """
+
+    _validate_serial(serial)
+
+    settings = _SERIAL_DICT[serial].settings
+    try:
+        return settings[cam_node_str]
+    except KeyError:
+        pass
+
+    value = node_cmd(serial, cam_node_str, 'GetValue')
+
+    # Only cache value if the camera can't change it by itself; auto node value is itself cached since it only changes
+    # when a node is set
+    auto_node_str = _SETTING_AUTO_NODES.get(cam_node_str)
+    if auto_node_str is None or _get_setting(serial, auto_node_str) == _pyspin_const(auto_node_str + '_Off'):
+        value = settings.setdefault(cam_node_str, value)
+
+    return value
 
 
 def _get_cam(serial):
@@ -251,15 +535,15 @@ def _get_cam(serial):
 
     _validate_serial(serial)
 
-    return _SERIAL_DICT[serial]['cam']
+    return _SERIAL_DICT[serial].cam
 
 
-def _get_timestamp_offset(serial):
-    """ Returns camera timestamp offset """
+def _get_timestamp_offset_ns(serial):
+    """ Returns camera timestamp offset in nanoseconds """
 
     _validate_serial(serial)
 
-    return _SERIAL_DICT[serial]['timestamp_offset']
+    return _SERIAL_DICT[serial].timestamp_offset_ns
 
 
 def _get_and_validate_cam(serial):
@@ -274,12 +558,35 @@ def _get_and_validate_cam(serial):
 def _get_and_validate_init_cam(serial):
     """ Validates initialization of camera then returns it """
 
+    # Trusted cameras have already been fully validated during a lifecycle event (setup, init, or start of acquisition),
+    # so skip querying the camera again
     cam = _get_cam(serial)
-    _validate_cam_init(cam, serial)
+    if not _SERIAL_DICT[serial].trusted:
+        _validate_cam_init(cam, serial)
 
     return cam
 
 
+def _trust_cam(serial):
+    """ Fully validates initialization of camera and marks it as trusted """
+
+    _validate_cam_init(_get_cam(serial), serial)
+
+    _SERIAL_DICT[serial].trusted = True
+
+
+def _get_streaming(serial):
+    """ Returns streaming camera and its timestamp offset """
+
+    # Use cached streaming camera if acquisition was started through start_acquisition(); it gets cleared by
+    # end_acquisition() and when the camera is removed
+    cam_entry = _SERIAL_DICT.get(serial)
+    if cam_entry is not None and cam_entry.streaming is not None:
+        return cam_entry.streaming
+
+    return _get_and_validate_streaming_cam(serial), _get_timestamp_offset_ns(serial)
+
+
 def _get_and_validate_streaming_cam(serial):
     """ Validates streaming of camera then returns it """
 
@@ -297,38 +604,71 @@ def _get_and_validate_streaming_cam(serial):
 def setup(yaml_path):
     """ This will setup (initialize + configure) a camera given a yaml configuration file """
 
+    # Load yaml file once; it gets passed to _setup() so it isn't parsed again
+    yaml_dict, cache_key = _load_yaml_cached(yaml_path)
+
     # Get serial from yaml file
-    with open(yaml_path, 'rb') as file:
-        yaml_dict = yaml.load(file, Loader=yaml.SafeLoader)
-        if isinstance(yaml_dict, dict) and 'serial' in yaml_dict:
-            # yaml might cast serial to number
-            serial = str(yaml_dict['serial'])
-        else:
-            raise RuntimeError('Invalid yaml file: "' + yaml_path + '". Missing "serial" field.')
+    if isinstance(yaml_dict, dict) and 'serial' in yaml_dict:
+        # yaml might cast serial to number
+        serial = str(yaml_dict['serial'])
+    else:
+        raise RuntimeError('Invalid yaml file: "' + yaml_path + '". Missing "serial" field.')
 
-    # Setup cam
-    _setup(_get_and_validate_cam(serial), yaml_path)
+    # Setup cam; get camera first since this also starts the module if needed
+    cam = _get_and_validate_cam(serial)
+    _setup(cam, _get_init_program(cache_key, yaml_dict))
+    _trust_cam(serial)
+    _SERIAL_DICT[serial].settings.clear()  # Settings were changed during setup
 
     # Return serial
     return serial
 
 
+def setup_many(yaml_paths):
+    """ Sets up multiple cameras given yaml configuration files; cameras are set up concurrently since setup mostly
+        blocks on the devices. Returns serials in the same order as yaml_paths """
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(yaml_paths))) as executor:
+        return list(executor.map(setup, yaml_paths))
+
+
 def init(serial):
     """ Initializes camera """
 
     _get_and_validate_cam(serial).Init()
+    _trust_cam(serial)
 
 
 def deinit(serial):
     """ De-initializes camera """
 
-    _get_and_validate_cam(serial).DeInit()
+    cam = _get_and_validate_cam(serial)
+
+    # De-initializing also ends acquisition, so clear cached streaming camera; camera is no longer trusted either and
+    # its nodes are no longer valid
+    _SERIAL_DICT[serial].streaming = None
+    _SERIAL_DICT[serial].trusted = False
+    _SERIAL_DICT[serial].nodes = {}
+    _SERIAL_DICT[serial].checked_nodes = set()
+    _SERIAL_DICT[serial].settings = {}
+
+    cam.DeInit()
+
+
+def set_buffer_mode(serial, buffer_mode):
+    """ Sets stream buffer handling mode (e.g. "NewestOnly", "OldestFirst") for camera """
+
+    node_cmd(serial,
+             'TLStream.StreamBufferHandlingMode',
+             'SetValue',
+             'RW',
+             'PySpin.StreamBufferHandlingMode_' + buffer_mode)
 
 
 def get_gain(serial):
-    """ Gets gain from camera """
+    """ Gets gain from camera; value is cached unless auto gain is on """
 
-    return node_cmd(serial, 'Gain', 'GetValue')
+    return _get_setting(serial, 'Gain')
 
 
 def set_gain(serial, gain):
@@ -338,9 +678,9 @@ def set_gain(serial, gain):
 
 
 def get_exposure(serial):
-    """ Gets exposure from camera """
+    """ Gets exposure from camera; value is cached unless auto exposure is on """
 
-    return node_cmd(serial, 'ExposureTime', 'GetValue')
+    return _get_setting(serial, 'ExposureTime')
 
 
 def set_exposure(serial, exposure):
@@ -350,9 +690,10 @@ def set_exposure(serial, exposure):
 
 
 def get_frame_rate(serial):
-    """ Gets frame rate from camera """
+    """ Gets frame rate from camera; value is cached unless auto exposure is on. NOTE: the camera clamps frame rate
+        to what the exposure allows, so it may differ from the value that was set """
 
-    return node_cmd(serial, 'AcquisitionFrameRate', 'GetValue')
+    return _get_setting(serial, 'AcquisitionFrameRate')
 
 
 def set_frame_rate(serial, frame_rate):
@@ -361,24 +702,78 @@ def set_frame_rate(serial, frame_rate):
     node_cmd(serial, 'AcquisitionFrameRate', 'SetValue', 'RW', frame_rate)
 
 
+def apply_settings(serial, frame_rate=None, gain=None, exposure=None):
+    """ Sets frame rate, gain, and/or exposure for camera in a single pass; settings which are None are left as is """
+
+    cam_node_args = []
+    if frame_rate is not None:
+        cam_node_args.append(('AcquisitionFrameRate', frame_rate))
+    if gain is not None:
+        cam_node_args.append(('Gain', gain))
+    if exposure is not None:
+        cam_node_args.append(('ExposureTime', exposure))
+
+    node_set_many(serial, cam_node_args)
+
+
 def start_acquisition(serial):
     """ Starts acquisition of camera """
 
+    _trust_cam(serial)
     _get_and_validate_init_cam(serial).BeginAcquisition()
 
+    # Cache validated streaming camera so get_image() doesn't have to re-validate it every frame
+    _SERIAL_DICT[serial].streaming = (_get_and_validate_streaming_cam(serial), _get_timestamp_offset_ns(serial))
+
 
 def end_acquisition(serial):
     """ Ends acquisition of camera """
 
-    _get_and_validate_init_cam(serial).EndAcquisition()
+    cam = _get_and_validate_init_cam(serial)
+
+    # Clear cached streaming camera first
+    _SERIAL_DICT[serial].streaming = None
+
+    cam.EndAcquisition()
 
 
 def get_image(serial, *args):
     """ Gets image from camera """
 
-    return _get_image(_get_and_validate_streaming_cam(serial),
-                      _get_timestamp_offset(serial),
-                      *args)
+    return _get_image(*_get_streaming(serial), *args)
+
+
+def get_images(serials, *args):
+    """ Gets images from multiple cameras; images are grabbed concurrently so this takes about as long as the slowest
+        camera. Returns image dicts in the same order as serials; caller should handle releasing the images """
+
+    # Wait for all grabs to finish so images which were grabbed can be released if another grab fails
+    grab_futures = [_GRAB_POOL.submit(get_image, serial, *args) for serial in serials]
+    concurrent.futures.wait(grab_futures)
+
+    try:
+        return [grab_future.result() for grab_future in grab_futures]
+    except Exception:
+        for grab_future in grab_futures:
+            if grab_future.exception() is None and grab_future.result():
+                grab_future.result()['image'].Release()
+        raise
+
+
+def get_image_array(serial, *args, copy=False, out=None):
+    """ Gets image from camera along with a numpy array ("array") which is a view of the image buffer (or a copy for
+        packed pixel formats); the array is only valid until the image is released. Set copy to get an array which
+        stays valid after the image is released, or pass a preallocated array as out to copy into it instead of
+        allocating a new array every frame """
+
+    return _get_image_array(*_get_streaming(serial), *args, copy=copy, out=out)
+
+
+def get_image_handle(serial):
+    """ Returns callable which gets image from camera; this skips all lookups and validation, so it is only valid
+        until acquisition is ended, the timestamp offset is updated, or the camera is removed """
+
+    return functools.partial(_get_image, _get_and_validate_streaming_cam(serial), _get_timestamp_offset_ns(serial))
 
 
 def node_cmd(serial, cam_node_str, cam_method_str, pyspin_mode_str=None, cam_node_arg=None):
@@ -387,11 +782,38 @@ def node_cmd(serial, cam_node_str, cam_method_str, pyspin_mode_str=None, cam_nod
     # This function allows running node commands without explicitly accessing the camera object, which is nice as the
     # caller doesn't need to worry about handling/clearing cam objects
 
-    return _node_cmd(_get_and_validate_init_cam(serial),
-                     cam_node_str,
-                     cam_method_str,
-                     pyspin_mode_str,
-                     cam_node_arg)
+    cam = _get_and_validate_init_cam(serial)
+
+    # Format command argument in case it's a string containing a PySpin attribute; node commands are the only place
+    # strings get resolved at call time since yaml "init" arguments are resolved when they are compiled
+    if isinstance(cam_node_arg, str):
+        cam_node_arg = _resolve_pyspin_arg(cam_node_arg)
+
+    return _cam_node_cmd(serial,
+                         cam,
+                         cam_node_str,
+                         cam_method_str,
+                         pyspin_mode_str,
+                         cam_node_arg)
+
+
+def node_set_many(serial, cam_node_args, pyspin_mode_str='RW'):
+    """ Sets values of multiple cam nodes, in order, with optional access mode check. cam_node_args is a list of
+        (cam_node_str, cam_node_arg) pairs; camera is only retrieved and validated once """
+
+    cam = _get_and_validate_init_cam(serial)
+
+    for cam_node_str, cam_node_arg in cam_node_args:
+        # Format command argument in case it's a string containing a PySpin attribute
+        if isinstance(cam_node_arg, str):
+            cam_node_arg = _resolve_pyspin_arg(cam_node_arg)
+
+        _cam_node_cmd(serial,
+                      cam,
+                      cam_node_str,
+                      'SetValue',
+                      pyspin_mode_str,
+                      cam_node_arg)
 
 
 def update_timestamp_offset(serial):
@@ -402,26 +824,104 @@ def update_timestamp_offset(serial):
 
     _validate_serial(serial)
 
-    _SERIAL_DICT[serial]['timestamp_offset'] = _compute_timestamp_offset(_get_and_validate_init_cam(serial),
+    _SERIAL_DICT[serial].timestamp_offset_ns = _compute_timestamp_offset(_get_and_validate_init_cam(serial),
                                                                          _TIMESTAMP_OFFSET_ITERATIONS)
 
+    # Keep cached streaming camera in sync
+    if _SERIAL_DICT[serial].streaming is not None:
+        _SERIAL_DICT[serial].streaming = (_SERIAL_DICT[serial].cam, _SERIAL_DICT[serial].timestamp_offset_ns)
+
+
+def timestamp_ns_to_seconds(timestamp_ns):
+    """ Converts image timestamp in nanoseconds to epoch time in seconds """
+
+    return timestamp_ns/1e9
+
+
+def set_verbose(verbose):
+    """ Sets whether camera output (connections, node commands, etc...) gets printed """
+
+    if verbose:
+        _LOG.setLevel(logging.DEBUG)
+        if not _LOG.handlers:
+            _LOG.addHandler(logging.StreamHandler())
+    else:
+        _LOG.setLevel(logging.WARNING)
+
+
+def close():
+    """ Cleans up all cameras and releases the PySpin system; module gets started again on next use. This also gets
+        called at exit, but calling it explicitly makes cleanup deterministic for long running processes """
+
+    with _START_LOCK:
+        _destructor()
+
+
+@contextmanager
+def session():
+    """ Context manager which closes the module on exit, e.g.: "with multi_pyspin.session(): ..." """
+
+    try:
+        yield
+    finally:
+        close()
+
 
 # --------------------#
 # Event handler       #
 # ------------------- #
 
 
-class _SystemEventHandler(PySpin.InterfaceEvent):
-    """ This class handles when cameras are added or removed """
+def _create_system_event_handler():
+    """ Creates system event handler; class is defined here since PySpin is imported lazily """
+
+    class _SystemEventHandler(PySpin.InterfaceEvent):
+        """ This class handles when cameras are added or removed """
 
-    def __init__(self):
-        super(_SystemEventHandler, self).__init__()
+        def __init__(self):
+            super(_SystemEventHandler, self).__init__()
 
-    def OnDeviceArrival(self, serial):
-        _handle_cam_arrival(str(serial))
+        # Events are just queued so the PySpin callback returns immediately; they get handled by _cam_event_worker()
 
-    def OnDeviceRemoval(self, serial):
-        _handle_cam_removal(str(serial))
+        def OnDeviceArrival(self, serial):
+            _CAM_EVENT_QUEUE.put((str(serial), 'add'))
+
+        def OnDeviceRemoval(self, serial):
+            _CAM_EVENT_QUEUE.put((str(serial), 'remove'))
+
+    return _SystemEventHandler()
+
+
+def _cam_event_worker():
+    """ Handles queued camera events until a None event is received """
+
+    while True:
+        # Handle all pending events together so cameras only get enumerated once when several arrive at once (e.g. a
+        # hub gets plugged in)
+        cam_events = [_CAM_EVENT_QUEUE.get()]
+        while True:
+            try:
+                cam_events.append(_CAM_EVENT_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+
+        cam_list = None
+        for cam_event in cam_events:
+            if cam_event is None:
+                return
+
+            serial, kind = cam_event
+            try:
+                if kind == 'add':
+                    # Enumerate cameras on first arrival; this is slow
+                    if cam_list is None:
+                        cam_list = _SYSTEM.GetCameras()
+                    _handle_cam_arrival(serial, cam_list)
+                else:
+                    _handle_cam_removal(serial)
+            except Exception:
+                # Keep handling events even if one fails
+                _LOG.exception('%s - failed to handle camera event: "%s"', serial, kind)
 
 
 # --------------------#
@@ -430,19 +930,40 @@ class _SystemEventHandler(PySpin.InterfaceEvent):
 
 
 def _constructor():
-    global _SYSTEM, _SYSTEM_EVENT_HANDLER, _SERIAL_DICT
+    global _SYSTEM, _SYSTEM_EVENT_HANDLER, _CAM_EVENT_WORKER
+
+    # Resolve access modes up front
+    for pyspin_str in ('RW', 'RO', 'WO', 'NA', 'NI'):
+        _pyspin_const(pyspin_str)
 
     # Set system
     _SYSTEM = PySpin.System.GetInstance()
 
-    # Set cameras
-    cams = _SYSTEM.GetCameras()
-    for cam in cams:
-        # Treat them as new arrivals
-        _handle_cam_arrival(cam.GetUniqueID())
+    # Set cameras; these are basically treated as new arrivals, except timestamp offsets are computed for all cameras
+    # at once
+    cams = list(_SYSTEM.GetCameras())
+    serials = [cam.GetUniqueID() for cam in cams]
+    for serial in serials:
+        _LOG.info('%s - connected', serial)
+
+    # Must initialize first before timestamp can be computed; Init() mostly blocks on the device, so initialize cameras
+    # concurrently
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(cams))) as executor:
+        list(executor.map(lambda cam: cam.Init(), cams))
+
+    timestamp_offsets_ns = _compute_timestamp_offsets(cams, _TIMESTAMP_OFFSET_ITERATIONS)
+
+    # Add cam stuff to dict
+    with _SERIAL_DICT_LOCK:
+        for serial, cam, timestamp_offset_ns in zip(serials, cams, timestamp_offsets_ns):
+            _SERIAL_DICT[serial] = _CamEntry(cam, timestamp_offset_ns)
+
+    # Start camera event worker
+    _CAM_EVENT_WORKER = threading.Thread(target=_cam_event_worker, daemon=True)
+    _CAM_EVENT_WORKER.start()
 
     # Store event handler
-    _SYSTEM_EVENT_HANDLER = _SystemEventHandler()
+    _SYSTEM_EVENT_HANDLER = _create_system_event_handler()
 
     # Register event handler
     _SYSTEM.RegisterInterfaceEvent(_SYSTEM_EVENT_HANDLER)
@@ -450,7 +971,17 @@ def _constructor():
     # cams should clear itself after going out of scope
 
 
-_constructor()  # Should be called once when first imported
+def _ensure_started():
+    """ Imports PySpin and calls constructor if this hasn't been done yet """
+    global PySpin, _STARTED
+
+    # Constructor should only be called once; this is deferred until the module is actually used so that importing
+    # multi_pyspin is cheap
+    with _START_LOCK:
+        if not _STARTED:
+            import PySpin
+            _constructor()
+            _STARTED = True
 
 
 # --------------------#
@@ -460,29 +991,64 @@ _constructor()  # Should be called once when first imported
 
 def _destructor():
     """ Handles the release of the PySpin System object """
-
-    print('Cleaning up multi_pyspin...')
-
-    # Clean up cameras
-    for serial in list(_SERIAL_DICT):  # Use list() to cache since stuff is getting removed from dictionary in loop
-        # End acquisition
-        with suppress(Exception):
-            end_acquisition(serial)
-
-        # Deinit
-        with suppress(Exception):
-            deinit(serial)
-
-        # Clear camera stuff
-        _SERIAL_DICT.pop(serial, None)
-
-    # Debug output if system is still in use some how
+    global _SYSTEM, _SYSTEM_EVENT_HANDLER, _CAM_EVENT_WORKER, _STARTED
+
+    # Nothing to clean up if module was never started
+    if not _STARTED:
+        return
+
+    _LOG.info('Cleaning up multi_pyspin...')
+
+    # Unregister event handler first so no more camera events get queued; failing to clean up shouldn't stop the
+    # interpreter from exiting, so just log errors
+    try:
+        _SYSTEM.UnregisterInterfaceEvent(_SYSTEM_EVENT_HANDLER)
+    except Exception:
+        _LOG.exception('Failed to unregister system event handler')
+    _SYSTEM_EVENT_HANDLER = None
+
+    # Stop camera event worker and wait for it to finish, so it can't add a camera after cameras are cleaned up (or
+    # consume the stop event of a new worker if the module gets started again)
+    _CAM_EVENT_QUEUE.put(None)
+    _CAM_EVENT_WORKER.join()
+    _CAM_EVENT_WORKER = None
+
+    # Clean up cameras concurrently; camera stuff is popped from dictionary one at a time, so no copy of the dictionary
+    # is needed
+    threads = []
+    while True:
+        with _SERIAL_DICT_LOCK:
+            if not _SERIAL_DICT:
+                break
+            _, cam_entry = _SERIAL_DICT.popitem()
+
+        thread = threading.Thread(target=_cleanup_cam, args=(cam_entry.cam,))
+        try:
+            thread.start()
+            threads.append(thread)
+        except RuntimeError:
+            # Some python versions don't allow starting threads during interpreter shutdown
+            _cleanup_cam(cam_entry.cam)
+    for thread in threads:
+        thread.join()
+
+    # Drop remaining camera references so the system can be released
+    cam_entry = None
+    threads = None
+
+    # Warn if system is still in use some how
     if _SYSTEM.IsInUse():
-        print('System is still in use? How can this be? Printing all globals:')
-        for name, value in globals().items():
-            print(name, value)
+        _LOG.warning('System is still in use? Some camera references were not cleaned up.')
+
+    # Release system explicitly rather than relying on it going out of scope at interpreter exit
+    try:
+        _SYSTEM.ReleaseInstance()
+    except Exception:
+        _LOG.exception('Failed to release system')
+    _SYSTEM = None
 
-    # PySpin system goes out of scope here, so no need to explicitly release the system
+    # Module is no longer started, so cleaning up again is a no-op
+    _STARTED = False
 
 
 atexit.register(_destructor)
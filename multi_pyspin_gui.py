@@ -8,17 +8,21 @@
 #   -spinnaker version:             spinnaker-1.23.0.27-amd64-Ubuntu18.04
 #   -spinnaker python version:      spinnaker_python-1.23.0.27-cp36-cp36m-linux_x86_64
 
+import os
 import sys
-import copy
 import time
-import queue
+import itertools
+import threading
 import functools
+import collections
+import concurrent.futures
 from datetime import datetime
 from tkinter import messagebox
 
 import numpy as np
 
 import matplotlib.pyplot as plt
+from matplotlib.colors import Normalize
 from matplotlib.widgets import TextBox
 from matplotlib.widgets import Button
 from matplotlib.widgets import Slider
@@ -27,6 +31,18 @@ import PySpin
 
 import multi_pyspin
 
+# fast_histogram is much faster than np.histogram for uniform bins; fall back to numpy if it's not installed
+try:
+    from fast_histogram import histogram1d as _histogram1d
+except ImportError:
+    _histogram1d = None
+
+# OpenCV is used to downsample streamed images (area interpolation) and to save png/tiff images if it's installed
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
 
 # ------------------- #
 # "attributes"        #
@@ -36,6 +52,7 @@ import multi_pyspin
 # Set default number of cameras and set serial numbers
 _NUM_CAMS = 1
 _SERIALS = [None]
+_MAX_VALS = [None]  # Max pixel value per camera; gets set from the pixel format after camera is setup
 
 # These are default min/max values. You can actually grab these from the camera nodes, but since we want to synchronize
 # across all cameras I've set defaults here.
@@ -46,28 +63,117 @@ _EXPOSURE_MAX = 1000000    # actual max is much larger, but more than 1 second e
 _FPS_MIN = 1
 _FPS_MAX = 120
 
+# Max pixel values of supported pixel formats
+_PIXEL_FORMAT_MAX_VALS = {PySpin.PixelFormat_Mono8: 2**8 - 1,
+                          PySpin.PixelFormat_Mono12: 2**12 - 1,
+                          PySpin.PixelFormat_Mono12p: 2**12 - 1,
+                          PySpin.PixelFormat_Mono16: 2**16 - 1}
+
 # Timeout factor is a multiple of the "resulting" fps which sets a timeout to prevent infinite hanging in case something
 # goes wrong or a trigger is set
 _IMAGE_TIMEOUT_FACTOR = 5  # Multiple of image period
 _IMAGE_TIMEOUT_MIN = 5000  # Minimum timeout
-_IMAGE_TIMEOUT = None      # Gets set after camera is setup or exposure/fps values get updated
+_IMAGE_TIMEOUTS = {}       # Per serial; gets set after camera is setup or exposure/fps values get updated
+_LAST_TIMEOUT_FPS = {}     # Per serial; effective fps the current timeout was computed from
+_STREAM_STOP_TIMEOUT = 0.5  # Seconds to wait for acquisition thread to stop before ending acquisition under it
 
 # Set stream buffer count, which determines the buffer queue size in PC RAM
 _STREAM_BUFFER_COUNT = 10  # TODO: Possibly calculate this dynamically...
 
+# Supported image extensions for saving; png is compressed (slow), tiff and npy are uncompressed (fast)
+_IMAGE_EXTS = ('.png', '.tif', '.tiff', '.npy')
+
+# Datetime format used in saved image names; matches the original names, e.g. 2019-05-28-22:28:10-795899
+_DATETIME_FORMAT = '%Y-%m-%d-%H:%M:%S-%f'
+
 # Delay warning tolerance
 _DELAY_WARNING_TOLERANCE = 1e-3
 
+# Last part of the delay (in seconds) is spun instead of slept, since sleep can overshoot
+_DELAY_SPIN_TIME = 1e-3
+
 # Set number of histogram bins
 _NUM_HISTOGRAM_BINS = 50
 
+# Interval of GUI timer which handles streams and callbacks in ms
+_TIMER_INTERVAL = 33
+
 # GUI params
 _FIG = None
-_QUEUE = queue.Queue()
+_QUEUE = collections.OrderedDict()  # Keyed so stale callbacks (e.g. while dragging a slider) get coalesced
+_QUEUE_LOCK = threading.Lock()
+_QUEUE_COUNTER = itertools.count()
 _STREAMS = [False]
+_FRAME_RINGS = [None]  # Gets set while camera is streaming
 _IMSHOW_DICTS = [{}]
 _HIST_DICTS = [{}]
 _GUI_DICT = None
+_SUPPRESS_CALLBACKS = False  # Set while widget values are updated programmatically
+_IN_TICK = False             # Set while GUI timer callback is running
+
+# Thread pools used to save images and set nodes of multiple cameras in parallel
+_SAVE_POOL = concurrent.futures.ThreadPoolExecutor()
+_NODE_POOL = concurrent.futures.ThreadPoolExecutor()
+
+
+# ------------------- #
+# Frame ring          #
+# ------------------- #
+
+
+class _FrameRing(object):
+    """ Holds the latest frames of a streaming camera. An acquisition thread writes frames and the GUI reads the
+        latest one, so displaying frames doesn't throttle acquisition. Three buffers are used so the acquisition thread
+        always has a buffer to write to which isn't the latest frame or being read.
+    """
+
+    __slots__ = ('lock', 'stop', 'thread', 'error', 'bufs', 'bitsperpixels', 'latest', 'reading', 'seq', 'read_seq')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.thread = None
+        self.error = None
+        self.bufs = [None, None, None]
+        self.bitsperpixels = [None, None, None]
+        self.latest = None
+        self.reading = None
+        self.seq = 0
+        self.read_seq = 0
+
+    def write(self, array, bitsperpixel):
+        """ Copies array into a free buffer and publishes it as the latest frame """
+
+        with self.lock:
+            i = next(i for i in range(len(self.bufs)) if i != self.latest and i != self.reading)
+
+        # Buffer i can't be read until it's published, so copy outside of lock
+        if self.bufs[i] is None or self.bufs[i].shape != array.shape or self.bufs[i].dtype != array.dtype:
+            self.bufs[i] = np.empty_like(array)
+        np.copyto(self.bufs[i], array)
+        self.bitsperpixels[i] = bitsperpixel
+
+        with self.lock:
+            self.latest = i
+            self.seq += 1
+
+    def read(self):
+        """ Returns (array, bitsperpixel) of latest frame, or None if there isn't a new frame. Call done() when finished
+            with the array """
+
+        with self.lock:
+            if self.latest is None or self.seq == self.read_seq:
+                return None
+            self.reading = self.latest
+            self.read_seq = self.seq
+
+            return self.bufs[self.reading], self.bitsperpixels[self.reading]
+
+    def done(self):
+        """ Releases buffer returned by read() """
+
+        with self.lock:
+            self.reading = None
 
 
 # ------------------- #
@@ -78,10 +184,28 @@ _GUI_DICT = None
 def _update_fig(fig):
     """ Updates figure """
 
-    fig.canvas.draw()
+    # draw_idle() coalesces multiple draw requests into a single draw, which happens when events are flushed
+    fig.canvas.draw_idle()
     fig.canvas.flush_events()
 
 
+def _capture_background(fig, axes, plot_dict):
+    """ Caches background of axes and draws animated artists on top of it; call this after the figure is drawn """
+
+    plot_dict['bg'] = fig.canvas.copy_from_bbox(axes.bbox)
+    for artist in plot_dict['artists']:
+        axes.draw_artist(artist)
+
+
+def _blit_plot(fig, axes, plot_dict):
+    """ Redraws animated artists over the cached background and blits only the axes """
+
+    fig.canvas.restore_region(plot_dict['bg'])
+    for artist in plot_dict['artists']:
+        axes.draw_artist(artist)
+    fig.canvas.blit(axes.bbox)
+
+
 def _slider_with_text(fig, pos, slider_str, val_min, val_max, val_default, padding):
     """ Creates a slider with text box given a position """
 
@@ -197,8 +321,9 @@ def _cam_plot(fig, pos, cam_str, row_height, gain_min, gain_max, gain_default, p
             'gain_text': gain_text}
 
 
-def _multi_fig(fig, num_cams, gain_min, gain_max, gain_default, exposure_min, exposure_max, exposure_default, fps_min, fps_max, fps_default):
-    """ Creates multi cam GUI figure """
+@functools.lru_cache(maxsize=16)
+def _multi_fig_layout(num_cams):
+    """ Computes positions of multi cam GUI figure elements; positions are tuples since this gets cached """
 
     # Position params
     padding = 0.01
@@ -217,20 +342,102 @@ def _multi_fig(fig, num_cams, gain_min, gain_max, gain_default, exposure_min, ex
     counter_width = (((1 - 3*padding)/2) - 3*padding)/8
 
     # num cams button
-    num_cams_button_pos = [padding,
+    num_cams_button_pos = (padding,
                            1-row_height-padding,
                            num_cams_width,
-                           row_height]
-    num_cams_button_axes = fig.add_axes(num_cams_button_pos)
-    num_cams_button = Button(num_cams_button_axes, 'Set # Cams')
-    num_cams_button.label.set_fontsize(7)
+                           row_height)
 
     # num cams text
-    num_cams_text_pos = [num_cams_button_pos[0] + num_cams_button_pos[2] + padding,
+    num_cams_text_pos = (num_cams_button_pos[0] + num_cams_button_pos[2] + padding,
                          num_cams_button_pos[1],
                          num_cams_width,
-                         row_height]
-    num_cams_text_axes = fig.add_axes(num_cams_text_pos)
+                         row_height)
+
+    # cam plots
+    cam_plot_poss = tuple((i*(cam_plot_width-padding),
+                           cam_plot_height_offset,
+                           cam_plot_width,
+                           cam_plot_height) for i in range(num_cams))
+
+    # exposure slider
+    exposure_pos = (0, cam_plot_height_offset-row_height, 1, row_height)
+
+    # FPS slider
+    fps_pos = (exposure_pos[0], exposure_pos[1]-row_height-padding, 1, row_height)
+
+    # name format
+    name_format_pos = (name_format_width + 2*padding,
+                       fps_pos[1]-row_height-padding,
+                       name_format_width,
+                       row_height)
+
+    # save cam buttons
+    save_cam_button_poss = tuple((i*save_width + (i+1)*padding,
+                                  padding,
+                                  save_width,
+                                  row_height) for i in range(num_cams))
+
+    # multi save button
+    save_multi_button_pos = (num_cams*save_width + (num_cams+1)*padding,
+                             padding,
+                             save_width,
+                             row_height)
+
+    # num images text
+    num_images_text_pos = (save_multi_button_pos[0] + save_multi_button_pos[2] + num_images_width + padding,
+                           save_multi_button_pos[1],
+                           num_images_width,
+                           row_height)
+
+    # delay
+    delay_pos = (num_images_text_pos[0] + num_images_text_pos[2] + delay_width + padding,
+                 num_images_text_pos[1],
+                 delay_width,
+                 row_height)
+
+    # num burst
+    num_bursts_pos = (delay_pos[0] + delay_pos[2] + num_bursts_width + padding,
+                      delay_pos[1],
+                      num_bursts_width,
+                      row_height)
+
+    # counter
+    counter_pos = (num_bursts_pos[0] + num_bursts_pos[2] + counter_width + padding,
+                   num_bursts_pos[1],
+                   counter_width,
+                   row_height)
+
+    return {'padding': padding,
+            'row_height': row_height,
+            'num_cams_button_pos': num_cams_button_pos,
+            'num_cams_text_pos': num_cams_text_pos,
+            'cam_plot_poss': cam_plot_poss,
+            'exposure_pos': exposure_pos,
+            'fps_pos': fps_pos,
+            'name_format_pos': name_format_pos,
+            'save_cam_button_poss': save_cam_button_poss,
+            'save_multi_button_pos': save_multi_button_pos,
+            'num_images_text_pos': num_images_text_pos,
+            'delay_pos': delay_pos,
+            'num_bursts_pos': num_bursts_pos,
+            'counter_pos': counter_pos}
+
+
+def _multi_fig(fig, num_cams, gain_min, gain_max, gain_default, exposure_min, exposure_max, exposure_default, fps_min, fps_max, fps_default):
+    """ Creates multi cam GUI figure """
+
+    # Get positions; these only depend on the number of cameras so they get cached
+    layout = _multi_fig_layout(num_cams)
+    padding = layout['padding']
+    row_height = layout['row_height']
+
+    # num cams button
+    num_cams_button_axes = fig.add_axes(layout['num_cams_button_pos'])
+    num_cams_button = Button(num_cams_button_axes, 'Set # Cams')
+    num_cams_button.label.set_fontsize(7)
+
+    # num cams text
+    num_cams_text_axes = fig.add_axes(layout['num_cams_text_pos'])
     num_cams_text = TextBox(num_cams_text_axes, '')
     num_cams_text.set_val(str(num_cams))
 
@@ -244,12 +451,8 @@ def _multi_fig(fig, num_cams, gain_min, gain_max, gain_default, exposure_min, ex
         else:
             cam_str = cam_str + " (secondary)"
 
-        cam_plot_pos = [i*(cam_plot_width-padding),
-                        cam_plot_height_offset,
-                        cam_plot_width,
-                        cam_plot_height]
         cam_plot_dict = _cam_plot(fig,
-                                  cam_plot_pos,
+                                  layout['cam_plot_poss'][i],
                                   cam_str,
                                   row_height,
                                   gain_min,
@@ -260,9 +463,8 @@ def _multi_fig(fig, num_cams, gain_min, gain_max, gain_default, exposure_min, ex
         cam_plot_dicts.append(cam_plot_dict)
 
     # exposure slider
-    exposure_pos = [0, cam_plot_height_offset-row_height, 1, row_height]
     exposure_slider, exposure_text = _slider_with_text(fig,
-                                                       exposure_pos,
+                                                       layout['exposure_pos'],
                                                        'Exposure',
                                                        exposure_min,
                                                        exposure_max,
@@ -270,9 +472,8 @@ def _multi_fig(fig, num_cams, gain_min, gain_max, gain_default, exposure_min, ex
                                                        padding)
 
     # FPS slider
-    fps_pos = [exposure_pos[0], exposure_pos[1]-row_height-padding, 1, row_height]
     fps_slider, fps_text = _slider_with_text(fig,
-                                             fps_pos,
+                                             layout['fps_pos'],
                                              'FPS',
                                              fps_min,
                                              fps_max,
@@ -280,11 +481,7 @@ def _multi_fig(fig, num_cams, gain_min, gain_max, gain_default, exposure_min, ex
                                              padding)
 
     # name format
-    name_format_pos = [name_format_width + 2*padding,
-                       fps_pos[1]-row_height-padding,
-                       name_format_width,
-                       row_height]
-    name_format_axes = fig.add_axes(name_format_pos)
+    name_format_axes = fig.add_axes(layout['name_format_pos'])
     name_format_text = TextBox(name_format_axes, 'Name format')
     name_format_text.label.set_fontsize(7)
     name_format_text.set_val('{serial}_{datetime}_{cam}_{frameid}_{counter}')
@@ -293,61 +490,37 @@ def _multi_fig(fig, num_cams, gain_min, gain_max, gain_default, exposure_min, ex
     save_cam_buttons = []
     for i in range(num_cams):
         # save button
-        save_cam_button_pos = [i*save_width + (i+1)*padding,
-                               padding,
-                               save_width,
-                               row_height]
-        save_cam_button_axes = fig.add_axes(save_cam_button_pos)
+        save_cam_button_axes = fig.add_axes(layout['save_cam_button_poss'][i])
         save_cam_button = Button(save_cam_button_axes, 'Save Cam "' + str(i+1) + '"')
         save_cam_button.label.set_fontsize(7)
         # Append
         save_cam_buttons.append(save_cam_button)
 
     # multi save button
-    save_multi_button_pos = [num_cams*save_width + (num_cams+1)*padding,
-                             padding,
-                             save_width,
-                             row_height]
-    save_multi_button_axes = fig.add_axes(save_multi_button_pos)
+    save_multi_button_axes = fig.add_axes(layout['save_multi_button_pos'])
     save_multi_button = Button(save_multi_button_axes, 'Save Multi')
     save_multi_button.label.set_fontsize(7)
 
     # num images text
-    num_images_text_pos = [save_multi_button_pos[0] + save_multi_button_pos[2] + num_images_width + padding,
-                           save_multi_button_pos[1],
-                           num_images_width,
-                           row_height]
-    num_images_text_axes = fig.add_axes(num_images_text_pos)
+    num_images_text_axes = fig.add_axes(layout['num_images_text_pos'])
     num_images_text = TextBox(num_images_text_axes, '# Images')
     num_images_text.label.set_fontsize(7)
     num_images_text.set_val(1)
 
     # delay
-    delay_pos = [num_images_text_pos[0] + num_images_text_pos[2] + delay_width + padding,
-                 num_images_text_pos[1],
-                 delay_width,
-                 row_height]
-    delay_axes = fig.add_axes(delay_pos)
+    delay_axes = fig.add_axes(layout['delay_pos'])
     delay_text = TextBox(delay_axes, 'Delay')
     delay_text.label.set_fontsize(7)
     delay_text.set_val(1)
 
     # num burst
-    num_bursts_pos = [delay_pos[0] + delay_pos[2] + num_bursts_width + padding,
-                      delay_pos[1],
-                      num_bursts_width,
-                      row_height]
-    num_bursts_axes = fig.add_axes(num_bursts_pos)
+    num_bursts_axes = fig.add_axes(layout['num_bursts_pos'])
     num_bursts_text = TextBox(num_bursts_axes, '# Burst')
     num_bursts_text.label.set_fontsize(7)
     num_bursts_text.set_val(1)
 
     # counter
-    counter_pos = [num_bursts_pos[0] + num_bursts_pos[2] + counter_width + padding,
-                   num_bursts_pos[1],
-                   counter_width,
-                   row_height]
-    counter_axes = fig.add_axes(counter_pos)
+    counter_axes = fig.add_axes(layout['counter_pos'])
     counter_text = TextBox(counter_axes, 'Counter')
     counter_text.label.set_fontsize(7)
     counter_text.set_val(1)
@@ -368,49 +541,99 @@ def _multi_fig(fig, num_cams, gain_min, gain_max, gain_default, exposure_min, ex
             'counter_text': counter_text}
 
 
+def _downsample_for_axes(image, axes):
+    """ Downsamples image to roughly the pixel size of the axes; this uses cv2.resize() with area interpolation if
+        OpenCV is installed, otherwise strides are used so no copy is made """
+
+    # Use same factor in both directions to preserve aspect ratio; axes size is checked every call so resizing the
+    # figure is handled
+    stride = max(1, min(image.shape[0]//max(1, int(axes.bbox.height)),
+                        image.shape[1]//max(1, int(axes.bbox.width))))
+    if stride == 1:
+        return image
+
+    if cv2 is not None:
+        return cv2.resize(image, (image.shape[1]//stride, image.shape[0]//stride), interpolation=cv2.INTER_AREA)
+
+    return image[::stride, ::stride]
+
+
+@functools.lru_cache(maxsize=16)
+def _display_lut(max_val):
+    """ Returns lookup table which scales pixel values from [0, max_val] to uint8 """
+
+    return np.round(np.arange(max_val+1)*(255/max_val)).astype(np.uint8)
+
+
 def _plot_image(image, max_val, image_axes, imshow_dict):
     """ plots image somewhat fast """
 
+    # Only display roughly as many pixels as the axes has
+    image = _downsample_for_axes(image, image_axes)
+
+    # Scale to uint8 with a lookup table so matplotlib's normalization is fixed; values above max_val get clipped
+    if image.dtype != np.uint8 or max_val != 255:
+        image = np.take(_display_lut(max_val), image, mode='clip')
+
     # If image hasn't been plotted yet or if image size changes, then we must replot imshow
     if not imshow_dict or image.shape != imshow_dict['imshow_size']:
-        # Must reset axes and re-imshow()
-        image_axes.cla()
-        imshow_dict['imshow'] = image_axes.imshow(image, cmap='gray')
+        # Must re-imshow(); only remove the previous image so the axes (and its hidden ticks) don't need to be reset
+        if imshow_dict:
+            imshow_dict['imshow'].remove()
+        imshow_dict['imshow'] = image_axes.imshow(image,
+                                                  cmap='gray',
+                                                  norm=Normalize(vmin=0, vmax=255, clip=True),
+                                                  interpolation='nearest',
+                                                  animated=True)
         imshow_dict['imshow_size'] = image.shape
-        image_axes.set_xticklabels([])
-        image_axes.set_yticklabels([])
-        image_axes.set_xticks([])
-        image_axes.set_yticks([])
+        imshow_dict['artists'] = [imshow_dict['imshow']]
+        imshow_dict['bg'] = None  # Background must be recaptured after next full draw
     else:
-        # Can just "set_data" since data is the same size and has the same max val
-        imshow_dict['imshow'].set_data(image)
-
-    # Set clim to max value
-    imshow_dict['imshow'].set_clim(vmin=0, vmax=max_val)
+        # Can just "set_array" since data is the same size
+        imshow_dict['imshow'].set_array(image)
 
     return imshow_dict
 
 
+@functools.lru_cache(maxsize=16)
+def _hist_bin_starts(max_val, num_bins):
+    """ Returns starting pixel value of each histogram bin; bins span [0, max_val+1) so the last bin includes
+        saturated pixels """
+
+    # Use ceil so integer pixel values are binned the same as with float bin edges (fast_histogram/np.histogram)
+    return np.ceil(np.linspace(0, max_val+1, num_bins+1)[:-1]).astype(np.int64)
+
+
 def _plot_hist(image, max_val, num_bins, hist_axes, hist_dict):
     """ plots histogram somewhat fast """
 
     # Calculate histogram
-    hist, _ = np.histogram(image.ravel(), bins=num_bins, range=(0, max_val))
+    if _histogram1d is not None:
+        hist = _histogram1d(image, bins=num_bins, range=(0, max_val+1))
+    elif np.issubdtype(image.dtype, np.integer):
+        # Count every pixel value in a single pass, then sum counts into bins; much faster than np.histogram
+        counts = np.bincount(image.ravel(), minlength=max_val+1)[:max_val+1]
+
+        # Reuse histogram buffer from previous frame
+        hist = hist_dict.get('hist')
+        if hist is None or hist.shape[0] != num_bins:
+            hist = np.empty(num_bins, dtype=counts.dtype)
+        hist_dict['hist'] = np.add.reduceat(counts, _hist_bin_starts(max_val, num_bins), out=hist)
+    else:
+        hist, _ = np.histogram(image.ravel(), bins=num_bins, range=(0, max_val+1))
 
     # If histogram hasn't been plotted yet or if number of bins changes, then we must replot histogram
-    if not hist_dict or hist_dict['num_bins'] != num_bins:
-        # Must reset axes and plot hist
-        hist_axes.cla()
-        hist_dict['bar'] = hist_axes.bar(np.linspace(0, 1, num_bins), hist, color='k', width=1/(num_bins-1))
+    if 'line' not in hist_dict or hist_dict['num_bins'] != num_bins:
+        # Must replot hist; only remove the previous line so the axes (and its hidden ticks) don't need to be reset
+        if 'line' in hist_dict:
+            hist_dict['line'].remove()
+        hist_dict['line'], = hist_axes.step(np.linspace(0, 1, num_bins), hist, where='mid', color='k', animated=True)
         hist_dict['num_bins'] = num_bins
-        hist_axes.set_xticklabels([])
-        hist_axes.set_yticklabels([])
-        hist_axes.set_xticks([])
-        hist_axes.set_yticks([])
+        hist_dict['artists'] = [hist_dict['line']]
+        hist_dict['bg'] = None  # Background must be recaptured after next full draw
     else:
-        # Just reset height
-        for i, bar in enumerate(hist_dict['bar']):
-            bar.set_height(hist[i])
+        # Just reset heights; this is a single array update for the whole histogram
+        hist_dict['line'].set_ydata(hist)
 
     # Set height to max histogram value
     hist_axes.set_ylim(0, np.max(hist))
@@ -418,6 +641,40 @@ def _plot_hist(image, max_val, num_bins, hist_axes, hist_dict):
     return hist_dict
 
 
+def _split_image_ext(name_format):
+    """ Splits image extension from name format; defaults to png if no supported extension is given """
+
+    name_format_root, image_ext = os.path.splitext(name_format)
+    if image_ext.lower() not in _IMAGE_EXTS:
+        return name_format, '.png'
+
+    return name_format_root, image_ext
+
+
+def _save_image(image, image_name):
+    """ Saves image; format is determined by the extension of image_name """
+
+    image_ext = os.path.splitext(image_name)[1].lower()
+    if image_ext == '.npy':
+        # Raw and uncompressed, so this is the fastest
+        np.save(image_name, image.GetNDArray())
+    elif cv2 is not None and image.GetBitsPerPixel() in (8, 16):
+        # OpenCV's encoders are faster; use low png compression and uncompressed tiff since saving speed matters more
+        # than file size here
+        if image_ext in ('.tif', '.tiff'):
+            written = cv2.imwrite(image_name, image.GetNDArray(), [cv2.IMWRITE_TIFF_COMPRESSION, 1])
+        else:
+            written = cv2.imwrite(image_name, image.GetNDArray(), [cv2.IMWRITE_PNG_COMPRESSION, 1])
+
+        # imwrite() returns False rather than raising when it fails (e.g. missing directory)
+        if not written:
+            raise RuntimeError('Failed to write ' + image_name)
+    elif image_ext in ('.tif', '.tiff'):
+        image.Save(image_name, PySpin.TIFF)
+    else:
+        image.Save(image_name, PySpin.PNG)
+
+
 # ------------------- #
 # "private" methods   #
 # ------------------- #
@@ -433,6 +690,22 @@ def _get_and_validate_serial(cam_num):
     return serial
 
 
+def _acquire_frames(serial, frame_ring):
+    """ Acquisition thread; grabs images into frame ring until stopped """
+
+    try:
+        while not frame_ring.stop.is_set():
+            image_dict = multi_pyspin.get_image_array(serial, _IMAGE_TIMEOUTS[serial])
+            if image_dict:
+                try:
+                    frame_ring.write(image_dict['array'], image_dict['bitsperpixel'])
+                finally:
+                    image_dict['image'].Release()
+    except Exception as e:
+        # Error gets raised by the GUI
+        frame_ring.error = e
+
+
 def _start_stream(cam_num):
     """ starts cam_num's stream """
 
@@ -441,12 +714,18 @@ def _start_stream(cam_num):
         serial = _get_and_validate_serial(cam_num)
 
         # Set buffer to newest only and acquisition mode to continuous
-        multi_pyspin.node_cmd(serial, 'TLStream.StreamBufferHandlingMode', 'SetValue', 'RW', 'PySpin.StreamBufferHandlingMode_NewestOnly')
-        multi_pyspin.node_cmd(serial, 'AcquisitionMode', 'SetValue', 'RW', 'PySpin.AcquisitionMode_Continuous')
+        multi_pyspin.node_set_many(serial, [('TLStream.StreamBufferHandlingMode', PySpin.StreamBufferHandlingMode_NewestOnly),
+                                            ('AcquisitionMode', PySpin.AcquisitionMode_Continuous)])
 
         # Start acquisition
         multi_pyspin.start_acquisition(serial)
 
+        # Start acquisition thread
+        frame_ring = _FrameRing()
+        frame_ring.thread = threading.Thread(target=_acquire_frames, args=(serial, frame_ring), daemon=True)
+        frame_ring.thread.start()
+        _FRAME_RINGS[cam_num] = frame_ring
+
         # Set stream to true; do this last
         _STREAMS[cam_num] = True
 
@@ -461,9 +740,18 @@ def _stop_stream(cam_num):
         # Set stream to false; do this first
         _STREAMS[cam_num] = False
 
+        # Stop acquisition thread; only wait briefly since the thread can be blocked waiting on an image for the whole
+        # image timeout. Ending acquisition aborts a wait which is still in progress, then the thread is joined; any
+        # error from the aborted wait is ignored since the frame ring is discarded.
+        frame_ring = _FRAME_RINGS[cam_num]
+        _FRAME_RINGS[cam_num] = None
+        frame_ring.stop.set()
+        frame_ring.thread.join(_STREAM_STOP_TIMEOUT)
+
         # Stop acquisition
         serial = _get_and_validate_serial(cam_num)
         multi_pyspin.end_acquisition(serial)
+        frame_ring.thread.join()
 
         print(serial + ' - stream stopped')
 
@@ -475,6 +763,24 @@ def _stop_streams():
         _stop_stream(cam_num)
 
 
+def _set_widget_val(widget, val):
+    """ sets widget value without triggering callbacks """
+    global _SUPPRESS_CALLBACKS
+
+    _SUPPRESS_CALLBACKS = True
+    try:
+        widget.set_val(val)
+    finally:
+        _SUPPRESS_CALLBACKS = False
+
+
+def _validate_range(name, val, val_min, val_max):
+    """ Checks value is within GUI range before it gets sent to cameras """
+
+    if not val_min <= val <= val_max:
+        raise RuntimeError(name + ' of ' + str(val) + ' is out of range [' + str(val_min) + ', ' + str(val_max) + ']')
+
+
 def _set_gain_text(cam_num, gain):
     """ sets gain for text """
 
@@ -482,9 +788,7 @@ def _set_gain_text(cam_num, gain):
     gain_text = _GUI_DICT['cam_plot_dicts'][cam_num]['gain_text']
 
     # Update text
-    gain_text.eventson = False
-    gain_text.set_val(gain)
-    gain_text.eventson = True
+    _set_widget_val(gain_text, gain)
 
 
 def _set_gain_slider(cam_num, gain):
@@ -494,9 +798,7 @@ def _set_gain_slider(cam_num, gain):
     gain_slider = _GUI_DICT['cam_plot_dicts'][cam_num]['gain_slider']
 
     # Update slider
-    gain_slider.eventson = False
-    gain_slider.set_val(gain)
-    gain_slider.eventson = True
+    _set_widget_val(gain_slider, gain)
 
 
 def _set_exposure_text(exposure):
@@ -506,9 +808,7 @@ def _set_exposure_text(exposure):
     exposure_text = _GUI_DICT['exposure_text']
 
     # Update text
-    exposure_text.eventson = False
-    exposure_text.set_val(exposure)
-    exposure_text.eventson = True
+    _set_widget_val(exposure_text, exposure)
 
 
 def _set_exposure_slider(exposure):
@@ -518,9 +818,7 @@ def _set_exposure_slider(exposure):
     exposure_slider = _GUI_DICT['exposure_slider']
 
     # Update slider
-    exposure_slider.eventson = False
-    exposure_slider.set_val(exposure)
-    exposure_slider.eventson = True
+    _set_widget_val(exposure_slider, exposure)
 
 
 def _set_fps_text(fps):
@@ -530,9 +828,7 @@ def _set_fps_text(fps):
     fps_text = _GUI_DICT['fps_text']
 
     # Update text
-    fps_text.eventson = False
-    fps_text.set_val(fps)
-    fps_text.eventson = True
+    _set_widget_val(fps_text, fps)
 
 
 def _set_fps_slider(fps):
@@ -542,28 +838,37 @@ def _set_fps_slider(fps):
     fps_slider = _GUI_DICT['fps_slider']
 
     # Update slider
-    fps_slider.eventson = False
-    fps_slider.set_val(fps)
-    fps_slider.eventson = True
+    _set_widget_val(fps_slider, fps)
 
 
 def _set_image_timeout(cam_num):
     """ sets image timeout """
-    global _IMAGE_TIMEOUT
 
     serial = _get_and_validate_serial(cam_num)
 
     # Get resulting FPS which is like the "effective" fps
     fps = multi_pyspin.node_cmd(serial, 'AcquisitionResultingFrameRate', 'GetValue')
 
+    # Timeout only depends on effective fps, so skip if it hasn't changed
+    if _LAST_TIMEOUT_FPS.get(serial) == fps:
+        return
+
     # Set timeout in ms
-    _IMAGE_TIMEOUT = max(int(_IMAGE_TIMEOUT_FACTOR*((1/fps)*1e3)), _IMAGE_TIMEOUT_MIN)
-    print(serial + ' - effective framerate: ' + str(fps) + '; image timeout set to: ' + str(_IMAGE_TIMEOUT))
+    _IMAGE_TIMEOUTS[serial] = max(int(_IMAGE_TIMEOUT_FACTOR*((1/fps)*1e3)), _IMAGE_TIMEOUT_MIN)
+    _LAST_TIMEOUT_FPS[serial] = fps
+    print(serial + ' - effective framerate: ' + str(fps) + '; image timeout set to: ' + str(_IMAGE_TIMEOUTS[serial]))
 
 
-def _set_exposure(exposure):
-    """ Tries to set exposure for all cameras """
+def _set_all_cams(set_func, val):
+    """ Tries to set value for all cameras; cameras are set concurrently so node writes overlap """
+
+    def _set_cam(cam_num, serial):
+        set_func(serial, val)
+
+        # Update image timeout
+        _set_image_timeout(cam_num)
 
+    set_futures = []
     for cam_num in range(_NUM_CAMS):
         # noinspection PyBroadException
         try:
@@ -571,35 +876,31 @@ def _set_exposure(exposure):
         except:
             continue
 
-        # Set exposure
-        multi_pyspin.set_exposure(serial, exposure)
+        set_futures.append(_NODE_POOL.submit(_set_cam, cam_num, serial))
 
-        # Update image timeout
-        _set_image_timeout(cam_num)
+    # Wait for all cameras to finish before raising any errors
+    concurrent.futures.wait(set_futures)
+    for set_future in set_futures:
+        set_future.result()
 
 
-def _set_fps(fps):
-    """ Tries to set fps for all cameras """
+def _set_exposure(exposure):
+    """ Tries to set exposure for all cameras """
 
-    for cam_num in range(_NUM_CAMS):
-        # noinspection PyBroadException
-        try:
-            serial = _get_and_validate_serial(cam_num)
-        except:
-            continue
+    _set_all_cams(multi_pyspin.set_exposure, exposure)
 
-        # Set fps
-        multi_pyspin.set_frame_rate(serial, fps)
 
-        # Update image timeout
-        _set_image_timeout(cam_num)
+def _set_fps(fps):
+    """ Tries to set fps for all cameras """
+
+    _set_all_cams(multi_pyspin.set_frame_rate, fps)
 
 
 def _save_images(cam_nums):
     """ Saves images """
 
     # Get info
-    name_format = _GUI_DICT['name_format_text'].text
+    name_format, image_ext = _split_image_ext(_GUI_DICT['name_format_text'].text)
     num_images = _GUI_DICT['num_images_text'].text
     delay = float(_GUI_DICT['delay_text'].text)
     num_bursts = int(_GUI_DICT['num_bursts_text'].text)
@@ -611,96 +912,115 @@ def _save_images(cam_nums):
         num_images = int(num_images)
 
     # Cache streams
-    streams = copy.deepcopy(_STREAMS)
+    streams = _STREAMS.copy()
+
+    # Validate and get serials once up front
+    serials = [_get_and_validate_serial(cam_num) for cam_num in cam_nums]
+
+    # Bind the parts of the image name that are constant per camera
+    name_formatters = [functools.partial(name_format.format, serial='SERIAL_' + serial, cam='CAM_' + str(cam_num+1))
+                       for cam_num, serial in zip(cam_nums, serials)]
+
+    # Image dicts are indexed by position in cam_nums and reused for every burst
+    image_dicts = [None]*len(cam_nums)
 
     # Disable all active streams
     _stop_streams()
 
     # Set StreamBufferCount (queue buffer on PC RAM). Note that for linux and usb cameras you must set usbfs to an
-    # appropriate size
-    for cam_num in cam_nums:
-        serial = _get_and_validate_serial(cam_num)
-        multi_pyspin.node_cmd(serial, 'TLStream.StreamBufferCountMode', 'SetValue', 'RW', 'PySpin.StreamBufferCountMode_Manual')
-        multi_pyspin.node_cmd(serial, 'TLStream.StreamBufferCountManual', 'SetValue', 'RW', _STREAM_BUFFER_COUNT)
+    # appropriate size. Also set buffer to oldest first, and set acquisition mode and acquisition frame count
+    node_args = [('TLStream.StreamBufferCountMode', PySpin.StreamBufferCountMode_Manual),
+                 ('TLStream.StreamBufferCountManual', _STREAM_BUFFER_COUNT),
+                 ('TLStream.StreamBufferHandlingMode', PySpin.StreamBufferHandlingMode_OldestFirst)]
+    # Setting a multiframe for a single image returns an error, so dispatch
+    if num_bursts == 1:
+        node_args.append(('AcquisitionMode', PySpin.AcquisitionMode_SingleFrame))
+    elif num_bursts > 1:
+        node_args.append(('AcquisitionMode', PySpin.AcquisitionMode_MultiFrame))
+        node_args.append(('AcquisitionFrameCount', num_bursts))
+    else:
+        raise RuntimeError('Invalid value for burst #: ' + str(num_bursts))
 
-    # Set buffer to oldest first, and set acquisition mode and acquisition frame count
-    for cam_num in cam_nums:
-        serial = _get_and_validate_serial(cam_num)
-        multi_pyspin.node_cmd(serial, 'TLStream.StreamBufferHandlingMode', 'SetValue', 'RW', 'PySpin.StreamBufferHandlingMode_OldestFirst')
-        # Setting a multiframe for a single image returns an error, so dispatch
-        if num_bursts == 1:
-            multi_pyspin.node_cmd(serial, 'AcquisitionMode', 'SetValue', 'RW', 'PySpin.AcquisitionMode_SingleFrame')
-        elif num_bursts > 1:
-            multi_pyspin.node_cmd(serial, 'AcquisitionMode', 'SetValue', 'RW', 'PySpin.AcquisitionMode_MultiFrame')
-            multi_pyspin.node_cmd(serial, 'AcquisitionFrameCount', 'SetValue', 'RW', num_bursts)
-        else:
-            raise RuntimeError('Invalid value for burst #: ' + str(num_bursts))
+    # Set all nodes with one call per camera
+    for serial in serials:
+        multi_pyspin.node_set_many(serial, node_args)
 
     # Update all timestamps before collecting images
-    for cam_num in cam_nums:
-        serial = _get_and_validate_serial(cam_num)
+    for serial in serials:
         multi_pyspin.update_timestamp_offset(serial)
 
     # Grab number of images
-    time_begin = datetime.now()
-    total_delay = 0
+    time_begin = time.monotonic()
     for num_image in range(num_images):
-        # Delay acquisition based on delay
-        while total_delay < num_image*delay:
-            total_delay = (datetime.now() - time_begin).total_seconds()
+        # Delay acquisition based on delay; sleep for most of it and only spin for the last bit to stay accurate
+        time_target = time_begin + num_image*delay
+        time_remaining = time_target - time.monotonic()
+        if time_remaining > _DELAY_SPIN_TIME:
+            time.sleep(time_remaining - _DELAY_SPIN_TIME)
+        while time.monotonic() < time_target:
+            pass
 
         # Make sure delay is not too off
-        if (total_delay - num_image*delay) > _DELAY_WARNING_TOLERANCE:
+        if (time.monotonic() - time_target) > _DELAY_WARNING_TOLERANCE:
             print('WARNING! Delay off by more than ' + str(_DELAY_WARNING_TOLERANCE) + '! Delay is probably too short...')
 
         # Start acquisition
-        for cam_num in cam_nums:
-            serial = _get_and_validate_serial(cam_num)
+        for serial in serials:
             multi_pyspin.start_acquisition(serial)
             print(serial + ' - acquisition started')
 
+        # Use longest image timeout of all cameras since images are grabbed together
+        timeout = max(_IMAGE_TIMEOUTS[serial] for serial in serials)
+
         # Grab burst of images
         try:
             for num_burst in range(num_bursts):
-                # Get images
-                image_dicts = [{} for _ in range(_NUM_CAMS)]
-                for cam_num in cam_nums:
-                    serial = _get_and_validate_serial(cam_num)
-                    image_dicts[cam_num] = multi_pyspin.get_image(serial, _IMAGE_TIMEOUT)  # Use timeout to be safe
+                # Get images (use timeout to be safe); images are grabbed from all cameras concurrently so the wait is
+                # for the slowest camera rather than the sum over all cameras. If a grab fails, images which were
+                # grabbed get released before the error is raised.
+                image_dicts[:] = multi_pyspin.get_images(serials, timeout)
 
                 # Make sure no frameids get skipped... once frames get dropped things can get ugly, so just skip the rest
-                frameids = [image_dicts[cam_num]['frameid'] for cam_num in cam_nums]
-                if frameids.count(num_burst) != len(frameids):
+                if any(image_dict['frameid'] != num_burst for image_dict in image_dicts):
+                    frameids = [image_dict['frameid'] for image_dict in image_dicts]
                     print('WARNING! Dropped frames detected. Current frameid is ' + str(num_burst) + '. Returned ' +
                           'frameids are ' + str(frameids) + '. FPS probably too high. Skipping...')
                     break
 
-                # Save images
-                for cam_num in cam_nums:
-                    serial = _get_and_validate_serial(cam_num)
-                    image_dict = image_dicts[cam_num]
+                # Save images; encoding is done in parallel across cameras
+                save_futures = []
+                for i, serial in enumerate(serials):
+                    image_dict = image_dicts[i]
 
                     # Make sure image is complete
                     if image_dict:
                         # Get image name
-                        image_name = name_format.format(serial='SERIAL_' + serial,
-                                                        datetime='DATETIME_' + str(datetime.fromtimestamp(image_dict['timestamp'])).replace('.', '-').replace(' ', '-').replace('_', '-'),
-                                                        cam='CAM_' + str(cam_num+1),
-                                                        frameid='FRAMEID_' + str(image_dict['frameid']),
-                                                        counter='COUNTER_' + str(counter))
-
-                        # Save image - for now only png is supported
-                        image_name = image_name + '.png'
-                        image_dict['image'].Save(image_name, PySpin.PNG)
-                        print(serial + ' - saved: ' + image_name)
+                        image_datetime = datetime.fromtimestamp(
+                            multi_pyspin.timestamp_ns_to_seconds(image_dict['timestamp_ns']))
+                        image_name = name_formatters[i](
+                            datetime='DATETIME_' + image_datetime.strftime(_DATETIME_FORMAT),
+                            frameid='FRAMEID_' + str(image_dict['frameid']),
+                            counter='COUNTER_' + str(counter))
+
+                        # Save image
+                        image_name = image_name + image_ext
+                        save_futures.append((serial,
+                                             image_name,
+                                             _SAVE_POOL.submit(_save_image, image_dict['image'], image_name)))
+
+                # Wait for all saves to finish before releasing any buffers
+                for serial, image_name, save_future in save_futures:
+                    save_future.result()
+                    print(serial + ' - saved: ' + image_name)
 
                 # Release image buffers - do this at the same time so queue buffer remains relatively synchronized
-                for cam_num in cam_nums:
-                    image_dicts[cam_num]['image'].Release()
+                for i, image_dict in enumerate(image_dicts):
+                    if image_dict:
+                        image_dict['image'].Release()
+                    image_dicts[i] = None
         finally:
             # End acquisition
-            for cam_num in cam_nums:
-                serial = _get_and_validate_serial(cam_num)
+            for serial in serials:
                 multi_pyspin.end_acquisition(serial)
                 print(serial + ' - acquisition ended')
 
@@ -723,19 +1043,136 @@ def _save_images(cam_nums):
             _start_stream(cam_num)
 
 
+def _stream_images():
+    """ stream update of images; this is called directly from the GUI timer rather than queued """
+
+    # Raise errors from acquisition threads
+    for cam_num in range(_NUM_CAMS):
+        if _STREAMS[cam_num] and _FRAME_RINGS[cam_num].error is not None:
+            error = _FRAME_RINGS[cam_num].error
+            _stop_stream(cam_num)  # If exception occurs, disable this stream
+            raise error
+
+    # Get latest frames; frames already displayed are skipped
+    frames = [None for _ in range(_NUM_CAMS)]
+    for cam_num in range(_NUM_CAMS):
+        if _STREAMS[cam_num]:
+            frames[cam_num] = _FRAME_RINGS[cam_num].read()
+
+    # Plot images
+    for cam_num in range(_NUM_CAMS):
+        if frames[cam_num] is not None:
+            image, bitsperpixel = frames[cam_num]
+
+            # Get max value; this is based on pixel format if it's known
+            max_val = _MAX_VALS[cam_num]
+            if max_val is None:
+                max_val = 2**bitsperpixel - 1
+
+            # Plot image
+            _IMSHOW_DICTS[cam_num] = _plot_image(image,
+                                                 max_val,
+                                                 _GUI_DICT['cam_plot_dicts'][cam_num]['image_axes'],
+                                                 _IMSHOW_DICTS[cam_num])
+
+            # Plot histogram
+            _HIST_DICTS[cam_num] = _plot_hist(image,
+                                              max_val,
+                                              _NUM_HISTOGRAM_BINS,
+                                              _GUI_DICT['cam_plot_dicts'][cam_num]['hist_axes'],
+                                              _HIST_DICTS[cam_num])
+
+            # Done with frame buffer
+            _FRAME_RINGS[cam_num].done()
+
+    # Update plots; only do a full draw if a plot was (re)created, otherwise just blit the image and histogram axes
+    streams = [cam_num for cam_num in range(_NUM_CAMS) if frames[cam_num] is not None]
+    if any(_IMSHOW_DICTS[cam_num]['bg'] is None or _HIST_DICTS[cam_num]['bg'] is None for cam_num in streams):
+        _update_fig(_FIG)  # Backgrounds get recaptured in _on_draw()
+    else:
+        for cam_num in streams:
+            _blit_plot(_FIG, _GUI_DICT['cam_plot_dicts'][cam_num]['image_axes'], _IMSHOW_DICTS[cam_num])
+            _blit_plot(_FIG, _GUI_DICT['cam_plot_dicts'][cam_num]['hist_axes'], _HIST_DICTS[cam_num])
+
+
+def _on_draw(_):
+    """ draw_event callback; recaptures cached backgrounds (e.g. after a resize) and redraws the animated artists """
+
+    for cam_num in range(len(_IMSHOW_DICTS)):
+        if _IMSHOW_DICTS[cam_num]:
+            image_axes = _GUI_DICT['cam_plot_dicts'][cam_num]['image_axes']
+            _capture_background(_FIG, image_axes, _IMSHOW_DICTS[cam_num])
+        if _HIST_DICTS[cam_num]:
+            hist_axes = _GUI_DICT['cam_plot_dicts'][cam_num]['hist_axes']
+            _capture_background(_FIG, hist_axes, _HIST_DICTS[cam_num])
+
+
+def _on_tick():
+    """ GUI timer callback; handles streams and queued callbacks """
+    global _IN_TICK
+
+    # Long running callbacks (e.g. saving) process GUI events so the GUI doesn't appear frozen, which can fire the
+    # timer again; ignore those ticks
+    if _IN_TICK:
+        return
+
+    _IN_TICK = True
+    try:
+        # Handle streams; attempt to stream images, if it fails, display an error message box and continue
+        if any(_STREAMS):
+            try:
+                _stream_images()
+            except Exception as e:
+                messagebox.showerror("Error", str(e))
+
+        # Handle queue; take all pending callbacks at once so the lock is only acquired once per tick. Callbacks queued
+        # while these run get handled next tick.
+        with _QUEUE_LOCK:
+            queued = list(_QUEUE.values())
+            _QUEUE.clear()
+
+        for func, args, kwargs in queued:
+            # Attempt to run function, if it fails, display an error message box and continue
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                messagebox.showerror("Error", str(e))
+
+        # Request a single redraw for all callbacks that ran; streamed images are blitted so they don't need this
+        if queued:
+            _FIG.canvas.draw_idle()
+    finally:
+        _IN_TICK = False
+
+
 # ------------------- #
 # Wrapped stuff       #
 # ------------------- #
 
 
-def _queue_wrapper(func):
-    """ wraps function such that it gets inserted into the queue when called """
+def _queue_wrapper(func=None, coalesce=False):
+    """ wraps function such that it gets inserted into the queue when called. If coalesce is set, a call replaces any
+        pending call of the same function with the same args (i.e. same camera); this is used for sliders, which fire
+        many events while being dragged. Otherwise every call gets queued.
+    """
+
+    if func is None:
+        return functools.partial(_queue_wrapper, coalesce=coalesce)
 
     @functools.wraps(func)
     def _wrapped_func(*args, **kwargs):
         """ wrapped function """
 
-        _QUEUE.put((func, args, kwargs))
+        # Ignore callbacks triggered by setting widget values programmatically
+        if _SUPPRESS_CALLBACKS:
+            return
+
+        with _QUEUE_LOCK:
+            if coalesce:
+                key = (func, args)
+            else:
+                key = next(_QUEUE_COUNTER)
+            _QUEUE[key] = (func, args, kwargs)
 
     return _wrapped_func
 
@@ -743,7 +1180,7 @@ def _queue_wrapper(func):
 @_queue_wrapper
 def _num_cams_wrapped():
     """ Handles changing the number of cameras """
-    global _NUM_CAMS, _SERIALS, _STREAMS, _IMSHOW_DICTS, _HIST_DICTS, _GUI_DICT
+    global _NUM_CAMS, _SERIALS, _MAX_VALS, _STREAMS, _FRAME_RINGS, _IMSHOW_DICTS, _HIST_DICTS, _GUI_DICT
 
     # Get num_cams_text
     num_cams_text = _GUI_DICT['num_cams_text']
@@ -765,7 +1202,9 @@ def _num_cams_wrapped():
 
     # Reset camera related lists; DO NOT do "[{}] * _NUM_CAMS", as this makes a duplicate reference
     _SERIALS = [None for _ in range(_NUM_CAMS)]
+    _MAX_VALS = [None for _ in range(_NUM_CAMS)]
     _STREAMS = [False for _ in range(_NUM_CAMS)]
+    _FRAME_RINGS = [None for _ in range(_NUM_CAMS)]
     _IMSHOW_DICTS = [{} for _ in range(_NUM_CAMS)]
     _HIST_DICTS = [{} for _ in range(_NUM_CAMS)]
 
@@ -842,6 +1281,9 @@ def _setup_wrapped(cam_num_new):
     # Store serial
     _SERIALS[cam_num_new] = serial_new
 
+    # Store max pixel value so it doesn't get recomputed every frame; None means it gets derived from the image
+    _MAX_VALS[cam_num_new] = _PIXEL_FORMAT_MAX_VALS.get(multi_pyspin.node_cmd(serial_new, 'PixelFormat', 'GetValue'))
+
     # Set image timeout
     _set_image_timeout(cam_num_new)
 
@@ -860,7 +1302,7 @@ def _stop_stream_wrapped(cam_num):
     _stop_stream(cam_num)
 
 
-@_queue_wrapper
+@_queue_wrapper(coalesce=True)
 def _gain_slider_wrapped(cam_num):
     """ gain slider callback """
 
@@ -896,6 +1338,9 @@ def _gain_text_wrapped(cam_num):
     gain = float(gain)
 
     try:
+        # Check range first so out of range values don't reach the camera
+        _validate_range('Gain', gain, _GAIN_MIN, _GAIN_MAX)
+
         # Set gain for camera
         serial = _get_and_validate_serial(cam_num)
         multi_pyspin.set_gain(serial, gain)
@@ -909,7 +1354,7 @@ def _gain_text_wrapped(cam_num):
     _set_gain_slider(cam_num, gain)
 
 
-@_queue_wrapper
+@_queue_wrapper(coalesce=True)
 def _exposure_slider_wrapped():
     """ exposure slider callback """
 
@@ -943,6 +1388,9 @@ def _exposure_text_wrapped():
     exposure = float(exposure)
 
     try:
+        # Check range first so out of range values don't reach the cameras
+        _validate_range('Exposure', exposure, _EXPOSURE_MIN, _EXPOSURE_MAX)
+
         # Set exposure for cameras
         _set_exposure(exposure)
     except:
@@ -955,7 +1403,7 @@ def _exposure_text_wrapped():
     _set_exposure_slider(exposure)
 
 
-@_queue_wrapper
+@_queue_wrapper(coalesce=True)
 def _fps_slider_wrapped():
     """ fps slider callback """
 
@@ -989,6 +1437,9 @@ def _fps_text_wrapped():
     fps = float(fps)
 
     try:
+        # Check range first so out of range values don't reach the cameras
+        _validate_range('FPS', fps, _FPS_MIN, _FPS_MAX)
+
         # Set fps for cameras
         _set_fps(fps)
     except:
@@ -1017,49 +1468,6 @@ def _save_multi_image_wrapped():
     _save_images(list(range(1, _NUM_CAMS)) + [0])
 
 
-@_queue_wrapper
-def _stream_images_wrapped():
-    """ stream update of images """
-
-    # Get image dicts
-    image_dicts = [{} for _ in range(_NUM_CAMS)]
-    for cam_num in range(_NUM_CAMS):
-        if _STREAMS[cam_num]:
-            try:
-                # Get image dict
-                serial = _get_and_validate_serial(cam_num)
-                image_dicts[cam_num] = multi_pyspin.get_image(serial, _IMAGE_TIMEOUT)
-            except:
-                # If exception occurs, disable this stream
-                _stop_stream(cam_num)
-                raise  # Reraise error
-
-    # Plot images
-    for cam_num in range(_NUM_CAMS):
-        if _STREAMS[cam_num]:
-            if image_dicts[cam_num]:
-                # Get image as numpy array
-                image = image_dicts[cam_num]['image'].GetNDArray()
-
-                # Plot image
-                _IMSHOW_DICTS[cam_num] = _plot_image(image,
-                                                     2**image_dicts[cam_num]['bitsperpixel'] - 1,
-                                                     _GUI_DICT['cam_plot_dicts'][cam_num]['image_axes'],
-                                                     _IMSHOW_DICTS[cam_num])
-
-                # Plot histogram
-                _HIST_DICTS[cam_num] = _plot_hist(image,
-                                                  2**image_dicts[cam_num]['bitsperpixel'] - 1,
-                                                  _NUM_HISTOGRAM_BINS,
-                                                  _GUI_DICT['cam_plot_dicts'][cam_num]['hist_axes'],
-                                                  _HIST_DICTS[cam_num])
-
-    # Release images
-    for cam_num in range(_NUM_CAMS):
-        if _STREAMS[cam_num]:
-            image_dicts[cam_num]['image'].Release()
-
-
 # ------------------- #
 # Set callbacks       #
 # ------------------- #
@@ -1104,11 +1512,12 @@ def _set_multi_fig_callbacks():
 
 def main():
     """ Main program """
-    global _NUM_CAMS, _SERIALS, _IMAGE_TIMEOUT, _FIG, _QUEUE, _STREAMS, _IMSHOW_DICTS, _HIST_DICTS, _GUI_DICT
+    global _NUM_CAMS, _SERIALS, _MAX_VALS, _IMAGE_TIMEOUTS, _LAST_TIMEOUT_FPS, _FIG, _QUEUE, _STREAMS, _FRAME_RINGS
+    global _IMSHOW_DICTS, _HIST_DICTS, _GUI_DICT
 
     # Create figure
     _FIG = plt.figure()
-    _FIG.show()  # Display it
+    _FIG.canvas.mpl_connect('draw_event', _on_draw)
 
     # Set GUI
     _GUI_DICT = _multi_fig(_FIG,
@@ -1125,34 +1534,14 @@ def main():
     # Set callbacks
     _set_multi_fig_callbacks()
 
-    # Update plot while figure exists
-    # noinspection PyBroadException
-    try:
-        while plt.fignum_exists(_FIG.number):
-            # Handle streams
-            if any(_STREAMS):
-                _stream_images_wrapped()
-
-            # Handle queue
-            while not _QUEUE.empty():
-                func, args, kwargs = _QUEUE.get()
-
-                # Attempt to run function, if it fails, display an error message box and continue
-                try:
-                    func(*args, **kwargs)
-                except Exception as e:
-                    messagebox.showerror("Error", str(e))
-
-                # Update fig
-                _update_fig(_FIG)
+    # Streams and queued callbacks are handled by a timer, so the GUI event loop drives everything
+    timer = _FIG.canvas.new_timer(interval=_TIMER_INTERVAL)
+    timer.add_callback(_on_tick)
+    timer.start()
 
-            # Update fig
-            _update_fig(_FIG)
-    except:
-        # Only re-raise error if figure is still open
-        time.sleep(1)  # I think this will let figure actually close
-        if plt.fignum_exists(_FIG.number):
-            raise
+    # Block until figure is closed
+    plt.show()
+    timer.stop()
 
     print('Cleaning up multi_pyspin_gui...')
 
@@ -1162,10 +1551,13 @@ def main():
     # Clean up
     _NUM_CAMS = 1
     _SERIALS = [None]
-    _IMAGE_TIMEOUT = None
+    _MAX_VALS = [None]
+    _IMAGE_TIMEOUTS = {}
+    _LAST_TIMEOUT_FPS = {}
     _FIG = None
-    _QUEUE = queue.Queue()
+    _QUEUE = collections.OrderedDict()
     _STREAMS = [False]
+    _FRAME_RINGS = [None]
     _IMSHOW_DICTS = [{}]
     _HIST_DICTS = [{}]
     _GUI_DICT = None